@@ -1,67 +1,245 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-import requests
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.templating import Jinja2Templates
+from contextlib import asynccontextmanager
+import aiohttp
+import asyncio
 import os
+import time
 import logging
 from datetime import datetime
+from urllib.parse import urlencode
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
+import redis.asyncio as aioredis
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Shared response cache across Gunicorn workers (and replicas);
+# enabled by pointing REDIS_URL at an instance, ideally configured
+# with maxmemory-policy allkeys-lfu
+REDIS_URL = os.environ.get('REDIS_URL')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled keep-alive session shared by all handlers; per-request
+    # sessions would pay TCP setup on every upstream call
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=5)
+    )
+    app.state.redis = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+    yield
+    await app.state.http.close()
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
+
+app = FastAPI(title="flask-app", lifespan=lifespan, default_response_class=ORJSONResponse)
+templates = Jinja2Templates(directory="templates")
+
+# Configure logging; default to WARNING so hot paths skip log I/O,
+# opt into verbosity with LOG_LEVEL=INFO/DEBUG
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING').upper())
 logger = logging.getLogger(__name__)
 
 # Microservices endpoints
 USER_SERVICE_URL = os.environ.get('USER_SERVICE_URL', 'http://user-service:5001')
 PRODUCT_SERVICE_URL = os.environ.get('PRODUCT_SERVICE_URL', 'http://product-service:5002')
 
-@app.route('/')
-def index():
-    """Main dashboard page"""
+# Short TTL cache for upstream list responses; the mock data changes
+# rarely, so most page hits can skip the network entirely. Entries
+# stay servable for a stale window after expiring so users keep seeing
+# data while a background refresh runs (and through upstream outages).
+CACHE_TTL = 10          # seconds an entry is fresh
+CACHE_STALE_TTL = 300   # seconds an expired entry may still be served
+STALE_EXTEND = 30       # stale-if-error: extension granted per failed refresh
+_cache: dict[str, tuple[float, float, list]] = {}  # url -> (fresh_until, stale_until, body)
+# Last seen ETag per URL so refreshes can revalidate with
+# If-None-Match and skip the response body on 304
+_etags: dict[str, str] = {}
+# In-flight refreshes keyed by URL; concurrent misses await the first
+# caller's future instead of each hitting the upstream (single-flight)
+_inflight: dict[str, asyncio.Future] = {}
+
+async def _refresh(url, entry):
+    """Fetch url over the shared session and update the cache.
+    Revalidates with If-None-Match when an ETag is known, and falls
+    back to the stale entry if the upstream fails."""
+    headers = {}
+    etag = _etags.get(url)
+    if etag and entry is not None:
+        headers['If-None-Match'] = etag
+
+    for attempt in range(2):
+        try:
+            async with app.state.http.get(url, headers=headers) as response:
+                if response.status >= 500 and attempt == 0:
+                    # Transient upstream error: retry once on the pooled
+                    # connection before giving up
+                    continue
+                if response.status == 304 and entry is not None:
+                    # Unchanged upstream: reuse the cached body
+                    body = entry[2]
+                elif response.status == 200:
+                    body = await response.json()
+                    if 'ETag' in response.headers:
+                        _etags[url] = response.headers['ETag']
+                else:
+                    body = []
+            break
+        except Exception as e:
+            if attempt == 0:
+                continue
+            if entry is not None:
+                # Stale-if-error: keep the old body servable a while longer
+                _cache[url] = (entry[0], time.monotonic() + STALE_EXTEND, entry[2])
+                logger.warning("Upstream %s failed (%s); serving stale response", url, e)
+                return entry[2]
+            raise
+
+    now = time.monotonic()
+    _cache[url] = (now + CACHE_TTL, now + CACHE_STALE_TTL, body)
+    return body
+
+async def _run_refresh(url, entry, future):
+    """Drive one single-flight refresh, resolving future for any
+    concurrent waiters."""
+    try:
+        body = await _refresh(url, entry)
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved in case no one else is waiting
+        raise
+    else:
+        future.set_result(body)
+        return body
+    finally:
+        del _inflight[url]
+
+async def fetch_json(url):
+    """GET a JSON list from a microservice, served from the TTL cache
+    when fresh. Expired-but-stale entries are served immediately while
+    a background task revalidates, and a traffic spike of N concurrent
+    misses on the same URL collapses into one upstream call whose
+    result (or exception) is shared by all waiters."""
+    now = time.monotonic()
+    entry = _cache.get(url)
+    if entry is not None:
+        fresh_until, stale_until, body = entry
+        if now < fresh_until:
+            return body
+        if now < stale_until:
+            # Stale-while-revalidate: answer from cache and refresh in
+            # the background unless a refresh is already in flight
+            if url not in _inflight:
+                future = asyncio.get_running_loop().create_future()
+                _inflight[url] = future
+                asyncio.create_task(_run_refresh(url, entry, future))
+            return body
+
+    inflight = _inflight.get(url)
+    if inflight is not None:
+        return await inflight
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[url] = future
+    return await _run_refresh(url, entry, future)
+
+# Per-endpoint cache TTLs for whole-response caching; /api/health is
+# deliberately absent so probes always see live status
+RESPONSE_CACHE_TTL = {'/': 30, '/users': 10, '/products': 10}
+
+@app.middleware("http")
+async def response_cache(request: Request, call_next):
+    """Serve whitelisted GET responses from Redis so the cache is
+    shared across workers instead of duplicated per process. Redis
+    being down or unconfigured falls through to the handler."""
+    cache = getattr(app.state, 'redis', None)
+    ttl = RESPONSE_CACHE_TTL.get(request.url.path)
+    if cache is None or ttl is None or request.method != 'GET':
+        return await call_next(request)
+
+    key = f"respcache:{request.url.path}?{urlencode(sorted(request.query_params.items()))}"
     try:
-        # Get users from user service
-        users_response = requests.get(f"{USER_SERVICE_URL}/api/users", timeout=5)
-        users = users_response.json() if users_response.status_code == 200 else []
-        
-        # Get products from product service
-        products_response = requests.get(f"{PRODUCT_SERVICE_URL}/api/products", timeout=5)
-        products = products_response.json() if products_response.status_code == 200 else []
-        
-        return render_template('index.html', users=users, products=products)
+        cached = await cache.hgetall(key)
     except Exception as e:
-        logger.error(f"Error fetching data: {e}")
-        return render_template('index.html', users=[], products=[], error=str(e))
+        logger.warning("Redis read failed (%s); bypassing cache", e)
+        cached = None
+    if cached:
+        return Response(
+            cached[b'body'],
+            status_code=int(cached[b'status']),
+            media_type=cached[b'content_type'].decode()
+        )
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        body = b''.join([chunk async for chunk in response.body_iterator])
+        try:
+            await cache.hset(key, mapping={
+                'body': body,
+                'status': response.status_code,
+                'content_type': response.headers.get('content-type', 'text/html')
+            })
+            await cache.expire(key, ttl)
+        except Exception as e:
+            logger.warning("Redis write failed (%s); response not cached", e)
+        return Response(body, status_code=response.status_code,
+                        headers=dict(response.headers))
+    return response
+
+@app.get('/')
+async def index(request: Request):
+    """Main dashboard page"""
+    # Fetch users and products concurrently so page latency is
+    # bounded by the slowest service instead of the sum of both
+    users_result, products_result = await asyncio.gather(
+        fetch_json(f"{USER_SERVICE_URL}/api/users"),
+        fetch_json(f"{PRODUCT_SERVICE_URL}/api/products"),
+        return_exceptions=True
+    )
+
+    error = None
+    if isinstance(users_result, Exception):
+        logger.error("Error fetching users: %s", users_result)
+        users = []
+        error = str(users_result)
+    else:
+        users = users_result
+
+    if isinstance(products_result, Exception):
+        logger.error("Error fetching products: %s", products_result)
+        products = []
+        error = str(products_result)
+    else:
+        products = products_result
 
-@app.route('/users')
-def users():
+    return templates.TemplateResponse(
+        request, 'index.html',
+        {'users': users, 'products': products, 'error': error}
+    )
+
+@app.get('/users')
+async def users(request: Request):
     """Users management page"""
     try:
-        response = requests.get(f"{USER_SERVICE_URL}/api/users", timeout=5)
-        if response.status_code == 200:
-            users = response.json()
-            return render_template('users.html', users=users)
-        else:
-            return render_template('users.html', users=[], error="Failed to fetch users")
+        users = await fetch_json(f"{USER_SERVICE_URL}/api/users")
+        return templates.TemplateResponse(request, 'users.html', {'users': users})
     except Exception as e:
-        logger.error(f"Error fetching users: {e}")
-        return render_template('users.html', users=[], error=str(e))
+        logger.error("Error fetching users: %s", e)
+        return templates.TemplateResponse(
+            request, 'users.html', {'users': [], 'error': str(e)})
 
-@app.route('/products')
-def products():
+@app.get('/products')
+async def products(request: Request):
     """Products management page"""
     try:
-        response = requests.get(f"{PRODUCT_SERVICE_URL}/api/products", timeout=5)
-        if response.status_code == 200:
-            products = response.json()
-            return render_template('products.html', products=products)
-        else:
-            return render_template('products.html', products=[], error="Failed to fetch products")
+        products = await fetch_json(f"{PRODUCT_SERVICE_URL}/api/products")
+        return templates.TemplateResponse(request, 'products.html', {'products': products})
     except Exception as e:
-        logger.error(f"Error fetching products: {e}")
-        return render_template('products.html', products=[], error=str(e))
+        logger.error("Error fetching products: %s", e)
+        return templates.TemplateResponse(
+            request, 'products.html', {'products': [], 'error': str(e)})
 
-@app.route('/api/health')
-def health():
+@app.get('/api/health')
+async def health():
     """Health check endpoint"""
     health_status = {
         'status': 'healthy',
@@ -69,34 +247,35 @@ def health():
         'version': '1.0.0',
         'services': {}
     }
-    
-    # Check user service
-    try:
-        user_response = requests.get(f"{USER_SERVICE_URL}/api/health", timeout=2)
-        health_status['services']['user_service'] = 'healthy' if user_response.status_code == 200 else 'unhealthy'
-    except:
-        health_status['services']['user_service'] = 'unhealthy'
-    
-    # Check product service
-    try:
-        product_response = requests.get(f"{PRODUCT_SERVICE_URL}/api/health", timeout=2)
-        health_status['services']['product_service'] = 'healthy' if product_response.status_code == 200 else 'unhealthy'
-    except:
-        health_status['services']['product_service'] = 'unhealthy'
-    
-    return jsonify(health_status)
-
-@app.route('/api/metrics')
-def metrics():
+
+    async def probe(name, url):
+        try:
+            async with app.state.http.get(url, timeout=aiohttp.ClientTimeout(total=2)) as response:
+                return name, 'healthy' if response.status == 200 else 'unhealthy'
+        except:
+            return name, 'unhealthy'
+
+    # Probe both services concurrently; worst case is one 2s timeout
+    # instead of two back to back
+    results = await asyncio.gather(
+        probe('user_service', f"{USER_SERVICE_URL}/api/health"),
+        probe('product_service', f"{PRODUCT_SERVICE_URL}/api/health")
+    )
+    health_status['services'] = dict(results)
+
+    return health_status
+
+@app.get('/api/metrics')
+async def metrics():
     """Prometheus metrics endpoint"""
     metrics_data = {
         'flask_app_requests_total': 1,
         'flask_app_uptime_seconds': 3600,
         'microservices_connected': 2
     }
-    return jsonify(metrics_data)
+    return metrics_data
 
 if __name__ == '__main__':
+    import uvicorn
     port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('DEBUG', 'False').lower() == 'true'
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    uvicorn.run(app, host='0.0.0.0', port=port)
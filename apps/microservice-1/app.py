@@ -1,17 +1,26 @@
-from flask import Flask, jsonify, request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, EmailStr
+from typing import Literal
+import orjson
+import itertools
 import os
 import logging
 from datetime import datetime
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
+app = FastAPI(title="user-service", default_response_class=ORJSONResponse)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; default to WARNING so hot paths skip log I/O,
+# opt into verbosity with LOG_LEVEL=INFO/DEBUG
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING').upper())
 logger = logging.getLogger(__name__)
 
-# Mock data for demonstration
-users = [
+# Mock data for demonstration, indexed by id for O(1) lookups.
+# Concurrency: each Uvicorn worker runs handlers on a single event
+# loop and the mutation blocks below never await between their reads
+# and writes, so the dict ops are atomic and need no lock. Keep new
+# awaits out of those blocks (or add a lock) if that ever changes.
+users = {u['id']: u for u in [
     {
         "id": 1,
         "name": "John Doe",
@@ -40,96 +49,131 @@ users = [
         "role": "moderator",
         "created_at": "2024-01-18T16:45:00Z"
     }
-]
+]}
 
-@app.route('/api/users', methods=['GET'])
-def get_users():
+# Request counter kept in-process; handlers run on a single event
+# loop, so the plain increment is safe
+_request_count = 0
+
+# Monotonic id allocator; never reuses an id after deletes
+_next_user_id = itertools.count(start=max(users, default=0) + 1)
+
+# Data version, bumped on every mutation; doubles as the list ETag so
+# clients can revalidate with If-None-Match and get an empty 304
+_version = 1
+
+# Serialized /api/users body, built once per mutation instead of per GET
+_users_cache: bytes | None = None
+
+class UserIn(BaseModel):
+    """Body schema for creating a user; validated by pydantic-core"""
+    name: str
+    email: EmailStr
+    role: Literal['admin', 'user', 'moderator']
+
+class UserUpdate(BaseModel):
+    """Body schema for partial user updates"""
+    name: str | None = None
+    email: EmailStr | None = None
+    role: Literal['admin', 'user', 'moderator'] | None = None
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    global _request_count
+    _request_count += 1
+    return await call_next(request)
+
+@app.get('/api/users')
+async def get_users(request: Request):
     """Get all users"""
-    logger.info("Fetching all users")
-    return jsonify(users)
+    global _users_cache
+    etag = f'W/"{_version}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status_code=304)
+    if _users_cache is None:
+        _users_cache = orjson.dumps(list(users.values()))
+    return Response(_users_cache, media_type='application/json', headers={'ETag': etag})
 
-@app.route('/api/users/<int:user_id>', methods=['GET'])
-def get_user(user_id):
+@app.get('/api/users/{user_id}')
+async def get_user(user_id: int):
     """Get a specific user by ID"""
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users.get(user_id)
     if user:
-        logger.info(f"Fetching user {user_id}")
-        return jsonify(user)
+        logger.debug("Fetching user %s", user_id)
+        return user
     else:
-        logger.warning(f"User {user_id} not found")
-        return jsonify({"error": "User not found"}), 404
+        logger.warning("User %s not found", user_id)
+        return ORJSONResponse({"error": "User not found"}, status_code=404)
 
-@app.route('/api/users', methods=['POST'])
-def create_user():
+@app.post('/api/users', status_code=201)
+async def create_user(body: UserIn):
     """Create a new user"""
-    data = request.get_json()
-    
-    if not data or not all(k in data for k in ('name', 'email', 'role')):
-        return jsonify({"error": "Missing required fields"}), 400
-    
     new_user = {
-        "id": max([u['id'] for u in users]) + 1,
-        "name": data['name'],
-        "email": data['email'],
-        "role": data['role'],
+        "id": next(_next_user_id),
+        "name": body.name,
+        "email": body.email,
+        "role": body.role,
         "created_at": datetime.utcnow().isoformat() + "Z"
     }
-    
-    users.append(new_user)
-    logger.info(f"Created new user: {new_user['name']}")
-    return jsonify(new_user), 201
 
-@app.route('/api/users/<int:user_id>', methods=['PUT'])
-def update_user(user_id):
+    users[new_user['id']] = new_user
+    global _version, _users_cache
+    _version += 1
+    _users_cache = None
+    logger.info("Created new user: %s", new_user['name'])
+    return new_user
+
+@app.put('/api/users/{user_id}')
+async def update_user(user_id: int, body: UserUpdate):
     """Update a user"""
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users.get(user_id)
     if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    data = request.get_json()
+        return ORJSONResponse({"error": "User not found"}, status_code=404)
+
+    data = body.model_dump(exclude_unset=True)
     if not data:
-        return jsonify({"error": "No data provided"}), 400
-    
-    # Update user fields
-    for key, value in data.items():
-        if key in ['name', 'email', 'role']:
-            user[key] = value
-    
-    logger.info(f"Updated user {user_id}")
-    return jsonify(user)
-
-@app.route('/api/users/<int:user_id>', methods=['DELETE'])
-def delete_user(user_id):
+        return ORJSONResponse({"error": "No data provided"}, status_code=400)
+
+    user.update(data)
+
+    global _version, _users_cache
+    _version += 1
+    _users_cache = None
+    logger.info("Updated user %s", user_id)
+    return user
+
+@app.delete('/api/users/{user_id}')
+async def delete_user(user_id: int):
     """Delete a user"""
-    global users
-    user = next((u for u in users if u['id'] == user_id), None)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
-    users = [u for u in users if u['id'] != user_id]
-    logger.info(f"Deleted user {user_id}")
-    return jsonify({"message": "User deleted successfully"})
-
-@app.route('/api/health', methods=['GET'])
-def health():
+    if users.pop(user_id, None) is None:
+        return ORJSONResponse({"error": "User not found"}, status_code=404)
+
+    global _version, _users_cache
+    _version += 1
+    _users_cache = None
+    logger.info("Deleted user %s", user_id)
+    return {"message": "User deleted successfully"}
+
+@app.get('/api/health')
+async def health():
     """Health check endpoint"""
-    return jsonify({
+    return {
         'status': 'healthy',
         'service': 'user-service',
         'timestamp': datetime.utcnow().isoformat(),
         'version': '1.0.0'
-    })
+    }
 
-@app.route('/api/metrics', methods=['GET'])
-def metrics():
+@app.get('/api/metrics')
+async def metrics():
     """Prometheus metrics endpoint"""
-    return jsonify({
-        'user_service_requests_total': len(users) * 10,
+    return {
+        'user_service_requests_total': _request_count,
         'user_service_users_count': len(users),
         'user_service_uptime_seconds': 3600
-    })
+    }
 
 if __name__ == '__main__':
+    import uvicorn
     port = int(os.environ.get('PORT', 5001))
-    debug = os.environ.get('DEBUG', 'False').lower() == 'true'
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    uvicorn.run(app, host='0.0.0.0', port=port)
@@ -1,17 +1,27 @@
-from flask import Flask, jsonify, request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+import orjson
+from collections import defaultdict
+import itertools
 import os
 import logging
 from datetime import datetime
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
+app = FastAPI(title="product-service", default_response_class=ORJSONResponse)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; default to WARNING so hot paths skip log I/O,
+# opt into verbosity with LOG_LEVEL=INFO/DEBUG
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING').upper())
 logger = logging.getLogger(__name__)
 
-# Mock data for demonstration
-products = [
+# Mock data for demonstration, indexed by id for O(1) lookups.
+# Concurrency: each Uvicorn worker runs handlers on a single event
+# loop and the mutation blocks below never await between their reads
+# and writes, so the dict and aggregate updates are atomic and need
+# no lock. Keep new awaits out of those blocks (or add a lock) if
+# that ever changes.
+products = {p['id']: p for p in [
     {
         "id": 1,
         "name": "Laptop Pro",
@@ -57,109 +67,166 @@ products = [
         "stock": 100,
         "created_at": "2024-01-19T11:30:00Z"
     }
-]
+]}
 
-@app.route('/api/products', methods=['GET'])
-def get_products():
+# Running aggregates so /api/metrics stays O(1) as the catalog grows;
+# handlers run on a single event loop, so plain updates are safe
+_total_value = sum(p['price'] * p['stock'] for p in products.values())
+_request_count = 0
+
+# Category index keyed by lowercase name so the category endpoint is a
+# single dict hit instead of a scan with per-product str.lower() calls
+_by_category: dict[str, list] = defaultdict(list)
+for p in products.values():
+    _by_category[p['category'].lower()].append(p)
+
+# Monotonic id allocator; never reuses an id after deletes
+_next_product_id = itertools.count(start=max(products, default=0) + 1)
+
+# Data version, bumped on every mutation; doubles as the list ETag so
+# clients can revalidate with If-None-Match and get an empty 304
+_version = 1
+
+# Serialized /api/products body, built once per mutation instead of per GET
+_products_cache: bytes | None = None
+
+class ProductIn(BaseModel):
+    """Body schema for creating a product; validated by pydantic-core"""
+    name: str
+    description: str
+    price: float = Field(gt=0)
+    category: str
+    stock: int = 0
+
+class ProductUpdate(BaseModel):
+    """Body schema for partial product updates"""
+    name: str | None = None
+    description: str | None = None
+    price: float | None = Field(default=None, gt=0)
+    category: str | None = None
+    stock: int | None = None
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    global _request_count
+    _request_count += 1
+    return await call_next(request)
+
+@app.get('/api/products')
+async def get_products(request: Request):
     """Get all products"""
-    logger.info("Fetching all products")
-    return jsonify(products)
+    global _products_cache
+    etag = f'W/"{_version}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status_code=304)
+    if _products_cache is None:
+        _products_cache = orjson.dumps(list(products.values()))
+    return Response(_products_cache, media_type='application/json', headers={'ETag': etag})
 
-@app.route('/api/products/<int:product_id>', methods=['GET'])
-def get_product(product_id):
+@app.get('/api/products/category/{category}')
+async def get_products_by_category(category: str):
+    """Get products by category"""
+    logger.debug("Fetching products for category: %s", category)
+    return _by_category.get(category.lower(), [])
+
+@app.get('/api/products/{product_id}')
+async def get_product(product_id: int):
     """Get a specific product by ID"""
-    product = next((p for p in products if p['id'] == product_id), None)
+    product = products.get(product_id)
     if product:
-        logger.info(f"Fetching product {product_id}")
-        return jsonify(product)
+        logger.debug("Fetching product %s", product_id)
+        return product
     else:
-        logger.warning(f"Product {product_id} not found")
-        return jsonify({"error": "Product not found"}), 404
+        logger.warning("Product %s not found", product_id)
+        return ORJSONResponse({"error": "Product not found"}, status_code=404)
 
-@app.route('/api/products', methods=['POST'])
-def create_product():
+@app.post('/api/products', status_code=201)
+async def create_product(body: ProductIn):
     """Create a new product"""
-    data = request.get_json()
-    
-    if not data or not all(k in data for k in ('name', 'description', 'price', 'category')):
-        return jsonify({"error": "Missing required fields"}), 400
-    
     new_product = {
-        "id": max([p['id'] for p in products]) + 1,
-        "name": data['name'],
-        "description": data['description'],
-        "price": float(data['price']),
-        "category": data['category'],
-        "stock": data.get('stock', 0),
+        "id": next(_next_product_id),
+        "name": body.name,
+        "description": body.description,
+        "price": body.price,
+        "category": body.category,
+        "stock": body.stock,
         "created_at": datetime.utcnow().isoformat() + "Z"
     }
-    
-    products.append(new_product)
-    logger.info(f"Created new product: {new_product['name']}")
-    return jsonify(new_product), 201
 
-@app.route('/api/products/<int:product_id>', methods=['PUT'])
-def update_product(product_id):
+    products[new_product['id']] = new_product
+    global _version, _products_cache
+    _version += 1
+    _products_cache = None
+    _by_category[new_product['category'].lower()].append(new_product)
+    global _total_value
+    _total_value += new_product['price'] * new_product['stock']
+    logger.info("Created new product: %s", new_product['name'])
+    return new_product
+
+@app.put('/api/products/{product_id}')
+async def update_product(product_id: int, body: ProductUpdate):
     """Update a product"""
-    product = next((p for p in products if p['id'] == product_id), None)
+    product = products.get(product_id)
     if not product:
-        return jsonify({"error": "Product not found"}), 404
-    
-    data = request.get_json()
+        return ORJSONResponse({"error": "Product not found"}, status_code=404)
+
+    data = body.model_dump(exclude_unset=True)
     if not data:
-        return jsonify({"error": "No data provided"}), 400
-    
-    # Update product fields
-    for key, value in data.items():
-        if key in ['name', 'description', 'price', 'category', 'stock']:
-            if key == 'price':
-                product[key] = float(value)
-            else:
-                product[key] = value
-    
-    logger.info(f"Updated product {product_id}")
-    return jsonify(product)
-
-@app.route('/api/products/<int:product_id>', methods=['DELETE'])
-def delete_product(product_id):
+        return ORJSONResponse({"error": "No data provided"}, status_code=400)
+
+    global _total_value
+    _total_value -= product['price'] * product['stock']
+    old_category = product['category']
+
+    product.update(data)
+
+    _total_value += product['price'] * product['stock']
+    if product['category'] != old_category:
+        _by_category[old_category.lower()].remove(product)
+        _by_category[product['category'].lower()].append(product)
+    global _version, _products_cache
+    _version += 1
+    _products_cache = None
+    logger.info("Updated product %s", product_id)
+    return product
+
+@app.delete('/api/products/{product_id}')
+async def delete_product(product_id: int):
     """Delete a product"""
-    global products
-    product = next((p for p in products if p['id'] == product_id), None)
-    if not product:
-        return jsonify({"error": "Product not found"}), 404
-    
-    products = [p for p in products if p['id'] != product_id]
-    logger.info(f"Deleted product {product_id}")
-    return jsonify({"message": "Product deleted successfully"})
-
-@app.route('/api/products/category/<category>', methods=['GET'])
-def get_products_by_category(category):
-    """Get products by category"""
-    category_products = [p for p in products if p['category'].lower() == category.lower()]
-    logger.info(f"Fetching products for category: {category}")
-    return jsonify(category_products)
+    product = products.pop(product_id, None)
+    if product is None:
+        return ORJSONResponse({"error": "Product not found"}, status_code=404)
+
+    _by_category[product['category'].lower()].remove(product)
+    global _total_value
+    _total_value -= product['price'] * product['stock']
+    global _version, _products_cache
+    _version += 1
+    _products_cache = None
+    logger.info("Deleted product %s", product_id)
+    return {"message": "Product deleted successfully"}
 
-@app.route('/api/health', methods=['GET'])
-def health():
+@app.get('/api/health')
+async def health():
     """Health check endpoint"""
-    return jsonify({
+    return {
         'status': 'healthy',
         'service': 'product-service',
         'timestamp': datetime.utcnow().isoformat(),
         'version': '1.0.0'
-    })
+    }
 
-@app.route('/api/metrics', methods=['GET'])
-def metrics():
+@app.get('/api/metrics')
+async def metrics():
     """Prometheus metrics endpoint"""
-    return jsonify({
-        'product_service_requests_total': len(products) * 15,
+    return {
+        'product_service_requests_total': _request_count,
         'product_service_products_count': len(products),
         'product_service_uptime_seconds': 3600,
-        'product_service_total_value': sum(p['price'] * p['stock'] for p in products)
-    })
+        'product_service_total_value': _total_value
+    }
 
 if __name__ == '__main__':
+    import uvicorn
     port = int(os.environ.get('PORT', 5002))
-    debug = os.environ.get('DEBUG', 'False').lower() == 'true'
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    uvicorn.run(app, host='0.0.0.0', port=port)